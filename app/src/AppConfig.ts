@@ -1,8 +1,23 @@
 import * as fs from 'fs';
+import * as path from 'path';
 
 import ServiceConfig, { DEFAULT_TIMEOUT } from './syncthing/ServiceConfig';
 
+export type SourcePathQualifier = (sourcePath: string) => boolean;
+
+export function parseNumber(value: string | undefined, fallback: number): number {
+  const parsed = parseInt(value || '', 10);
+  return isNaN(parsed) ? fallback : parsed;
+}
+
 export default class AppConfig extends ServiceConfig {
+  // Loaded configs by path, so every caller shares the same config and with it the same connections
+  private static readonly instances: Map<string, AppConfig> = new Map();
+
+  // Normalized source and destination with a trailing separator, to map paths with plain string operations
+  public readonly sourcePrefix: string;
+  public readonly destinationPrefix: string;
+
   constructor(
     apiKey: string,
     host: string = 'localhost',
@@ -16,9 +31,20 @@ export default class AppConfig extends ServiceConfig {
     public excludes: RegExp | undefined = undefined,
   ) {
     super(apiKey, host, port, timeout, isHttps, sslCertFile);
+    this.sourcePrefix = path.join(source, path.sep);
+    this.destinationPrefix = path.join(destination, path.sep);
   }
 
   static getInstance(configPath: string = '/config/config.json'): AppConfig {
+    let instance = AppConfig.instances.get(configPath);
+    if (!instance) {
+      instance = AppConfig.load(configPath);
+      AppConfig.instances.set(configPath, instance);
+    }
+    return instance;
+  }
+
+  private static load(configPath: string): AppConfig {
     const fileContents = fs.readFileSync(configPath, 'utf8'),
       config: any = JSON.parse(fileContents);
 
@@ -32,7 +58,7 @@ export default class AppConfig extends ServiceConfig {
     }
 
     const host: string = process.env.SYNCTHING_HOST || '127.0.0.1',
-      port: number = parseInt(process.env.SYNCTHING_PORT || '8384'),
+      port: number = parseNumber(process.env.SYNCTHING_PORT, 8384),
       isHttps: boolean = ['1', 'true', 'yes'].includes((process.env.SYNCTHING_HTTPS || '0').toLowerCase()),
       sslCertFile: string | undefined = process.env.SYNCTHING_CERT_FILE;
 
@@ -40,13 +66,39 @@ export default class AppConfig extends ServiceConfig {
       apiKey,
       host,
       port,
-      parseInt(process.env.SYNCTHING_TIMEOUT || '60'),
+      parseNumber(process.env.SYNCTHING_TIMEOUT, 60),
       isHttps,
       sslCertFile,
       config.source || '/files/source/',
       config.destination || '/files/destination/',
       (config.filter || 'ItemFinished').split(','),
-      new RegExp(config.excludes || '')
+      // Compiled once here; an empty pattern would match every path, so none is created for it.
+      // Excessive backtracking falls back to the linear engine, if node runs with the flag of the Dockerfile
+      config.excludes ? new RegExp(config.excludes) : undefined
     );
   }
+
+  /**
+   * Returns the check, whether an event for a source path gets linked. The source prefix and the
+   * exclude pattern are bound once, so the check per event doesn't look them up on the config.
+   * It's done in memory only. Whether the path still exists is left to the link call, and folders
+   * are already filtered by their missing blocks hash, before an event gets checked.
+   *
+   * @param logger Console: logs why a path is ignored
+   */
+  createQualifier(logger: Console): SourcePathQualifier {
+    const { source, sourcePrefix, excludes } = this;
+
+    return (sourcePath: string): boolean => {
+      if (!sourcePath.startsWith(sourcePrefix)) {
+        logger.info('Ignoring event for %s because it does not start with %s.', sourcePath, source);
+        return false;
+      }
+      if (excludes && excludes.test(sourcePath)) {
+        logger.info('Ignoring %s because it matches exclude pattern.', sourcePath);
+        return false;
+      }
+      return true;
+    };
+  }
 }
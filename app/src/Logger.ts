@@ -1,7 +1,43 @@
 import fs, { WriteStream } from 'fs';
 import * as path from 'path';
+import type { Writable } from 'stream';
 import { format } from 'util';
 
+const LEVELS: Record<string, number> = { debug: 10, log: 20, info: 20, warn: 30, error: 40 };
+
+// All channels writing into the same file share one stream
+const logWriters: Map<string, WriteStream> = new Map();
+
+let levelConsole: Console | undefined,
+  configuredLevel: number | undefined,
+  timestampSecond: number = -1,
+  timestampPrefix: string = '';
+
+/**
+ * Returns the minimum level to write, configured by the environment variable LOG_LEVEL.
+ * The environment is only read once, as every logger instance asks for it.
+ */
+function minimumLevel(): number {
+  if (configuredLevel === undefined) {
+    configuredLevel = LEVELS[(process.env.LOG_LEVEL || 'info').toLowerCase()] ?? LEVELS.info;
+  }
+  return configuredLevel;
+}
+
+/**
+ * Returns the current time like 2024-01-31T12:34:56.789000+00:00. The date and time up to the seconds
+ * is only rendered once per second, every other record only appends the milliseconds.
+ */
+function timestamp(): string {
+  const now = Date.now(),
+    second = Math.floor(now / 1000);
+  if (second !== timestampSecond) {
+    timestampSecond = second;
+    timestampPrefix = new Date(now).toISOString().slice(0, 19);
+  }
+  return `${timestampPrefix}.${String(now % 1000).padStart(3, '0')}000+00:00`;
+}
+
 function rotateOldLogs(logDirectory: string): void {
   try {
     if (!fs.existsSync(logDirectory)) {
@@ -16,7 +52,7 @@ function rotateOldLogs(logDirectory: string): void {
       const match = file.match(/^linker-(\d{4})(\d{2})(\d{2})\.log$/);
       if (match) {
         const [, year, month, day] = match;
-        const fileDate = new Date(parseInt(year), parseInt(month) - 1, parseInt(day));
+        const fileDate = new Date(parseInt(year, 10), parseInt(month, 10) - 1, parseInt(day, 10));
 
         if (fileDate < tenDaysAgo) {
           const filePath = path.join(logDirectory, file);
@@ -30,20 +66,109 @@ function rotateOldLogs(logDirectory: string): void {
   }
 }
 
+/**
+ * Writes the output corked until the next tick, so all records logged while handling one event
+ * are handed to the file and stdout/stderr in a single write call instead of one per record.
+ *
+ * @param stream Writable: stream to write to
+ * @param output string: formatted log record
+ */
+function writeBatched(stream: Writable, output: string): void {
+  if (!stream.writableCorked) {
+    stream.cork();
+    process.nextTick(() => stream.uncork());
+  }
+  stream.write(output);
+}
+
+function closeLogWriters(): void {
+  // Records still corked on stdout/stderr would get lost on exit
+  [process.stdout, process.stderr].forEach(stream => {
+    while (stream.writableCorked) {
+      stream.uncork();
+    }
+  });
+  logWriters.forEach(logWriter => {
+    if (!logWriter.closed) {
+      logWriter.end();
+    }
+  });
+}
+
+/**
+ * Returns the stream for the log file, rotating old logs and registering the
+ * cleanup handlers only when the first stream gets opened.
+ *
+ * @param logFilePath string: path of the log file
+ */
+function getLogWriter(logFilePath: string): WriteStream {
+  let logWriter = logWriters.get(logFilePath);
+  if (logWriter) {
+    return logWriter;
+  }
+
+  if (logWriters.size === 0) {
+    process.on('exit', () => closeLogWriters());
+    process.on('SIGINT', () => closeLogWriters());
+    process.on('SIGTERM', () => closeLogWriters());
+    process.on('uncaughtException', error => {
+      new Logger(logFilePath).error('Uncaught exception:', error);
+      closeLogWriters();
+      process.exit(1);
+    });
+  }
+
+  rotateOldLogs(path.dirname(logFilePath));
+  logWriter = fs.createWriteStream(logFilePath, {flags: 'a', mode: 0o644});
+  logWriters.set(logFilePath, logWriter);
+
+  return logWriter;
+}
+
 export default class Logger implements Console {
+  // Loggers by channel, so callers binding a logger once and callers asking for it share the instance
+  private static readonly instances: Map<string, Logger> = new Map();
+
   protected channel: string;
   protected logWriter: WriteStream;
+  protected level: number;
+  protected prefixes: Record<string, string> = {};
   public Console: typeof console.Console = console.Console;
 
   constructor(logFilePath: string, channel?: string) {
     this.channel = channel?.toLowerCase() || '';
-    this.logWriter = fs.createWriteStream(logFilePath, {flags: 'a', mode: 0o644});
-    this.registerCleanupHandlers();
+    this.logWriter = getLogWriter(logFilePath);
+    this.level = minimumLevel();
+
+    // Channel and level of a record are rendered once, instead of for every record
+    const channelPrefix = this.channel ? `${this.channel}.` : '';
+    Object.keys(LEVELS).forEach(level => {
+      this.prefixes[level] = `${channelPrefix}${level.toUpperCase()}: `;
+    });
   }
 
   static getInstance(channel?: string): Console {
     if (!process.env.WRITE_LOGS) {
-      return console;
+      if (minimumLevel() <= LEVELS.debug) {
+        return console;
+      }
+      if (!levelConsole) {
+        // Methods below the configured level are replaced, so their arguments never get formatted
+        const filtered = new console.Console({ stdout: process.stdout, stderr: process.stderr });
+        (['debug', 'log', 'info', 'warn'] as const).forEach(level => {
+          if (LEVELS[level] < minimumLevel()) {
+            filtered[level] = () => undefined;
+          }
+        });
+        levelConsole = filtered;
+      }
+      return levelConsole;
+    }
+
+    const key = channel?.toLowerCase() || '';
+    let instance = Logger.instances.get(key);
+    if (instance) {
+      return instance;
     }
 
     const now = new Date(),
@@ -55,21 +180,9 @@ export default class Logger implements Console {
         ? logPathOverride
         : `/logs/linker-${year}${month}${day}.log`;
 
-    const logDirectory = path.dirname(logfilePath);
-    rotateOldLogs(logDirectory);
-
-    return new Logger(logfilePath, channel);
-  }
-
-  private registerCleanupHandlers(): void {
-    process.on('exit', () => this.close());
-    process.on('SIGINT', () => this.close());
-    process.on('SIGTERM', () => this.close());
-    process.on('uncaughtException', error => {
-      this.error('Uncaught exception:', error);
-      this.close();
-      process.exit(1);
-    });
+    instance = new Logger(logfilePath, channel);
+    Logger.instances.set(key, instance);
+    return instance;
   }
 
   public close(): void {
@@ -79,21 +192,24 @@ export default class Logger implements Console {
   }
 
   private write(level: string, ...args: any[]): void {
+    // Skip before formatting, so disabled messages don't pay for building the output
+    if (LEVELS[level] < this.level) {
+      return;
+    }
+
     const message = format(...args);
-    const timestamp = (new Date()).toISOString().slice(0, -1) + '000+00:00';
-    const channel = this.channel ? `${this.channel}.` : '';
-    const output = `[${timestamp}] ${channel}${level.toUpperCase()}: ${message}\n`;
+    const output = `[${timestamp()}] ${this.prefixes[level]}${message}\n`;
 
     // Write to a file
     try {
-      this.logWriter.write(output);
+      writeBatched(this.logWriter, output);
     } catch (error) {}
 
     // Also write to stdout/stderr for visibility
     if (level === 'error' || level === 'warn') {
-      process.stderr.write(output);
+      writeBatched(process.stderr, output);
     } else {
-      process.stdout.write(output);
+      writeBatched(process.stdout, output);
     }
   }
 
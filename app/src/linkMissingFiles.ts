@@ -0,0 +1,96 @@
+import * as fs from 'fs';
+import * as path from 'path';
+
+import AppConfig, { parseNumber } from './AppConfig';
+import { linkSourcePath } from './processSourcePath';
+
+// Links running at the same time, they are executed by the libuv thread pool. Twice as many links as threads
+// are queued, so a thread finishing a link finds the next one waiting. libuv defaults to 4 threads.
+const PARALLEL_LINKS = 2 * Math.max(1, parseNumber(process.env.UV_THREADPOOL_SIZE, 4));
+
+/**
+ * Walks the directory and yields every file.
+ *
+ * The entry types are taken from the directory listing itself (d_type), so no
+ * additional stat call is needed per entry. Symlinks are skipped as they can't be
+ * hardlinked into the destination anyway. Subdirectories are collected on a stack
+ * instead of recursing, so deep trees neither nest generators nor hit the stack limit.
+ * Folders, that vanished while walking or can't be read, are skipped.
+ *
+ * @param directory string: directory to walk
+ * @param logger Console
+ */
+function* walkSync(directory: string, logger: Console): Generator<string> {
+  const directories: string[] = [directory];
+
+  let current: string | undefined;
+  while ((current = directories.pop()) !== undefined) {
+    let entries: fs.Dirent[];
+    try {
+      entries = fs.readdirSync(current, { withFileTypes: true });
+    } catch (error) {
+      const code = (error as NodeJS.ErrnoException).code;
+      if (code !== 'ENOENT' && code !== 'EACCES') {
+        throw error;
+      }
+      logger.warn('Skipping %s because it can\'t be read (%s).', current, code);
+      continue;
+    }
+
+    for (const entry of entries) {
+      if (entry.isSymbolicLink()) {
+        continue;
+      }
+
+      const filePath = path.join(current, entry.name);
+      if (entry.isDirectory()) {
+        directories.push(filePath);
+      } else {
+        yield filePath;
+      }
+    }
+  }
+}
+
+/**
+ * Links all files of the source folder, that are missing in the destination folder.
+ *
+ * This walks the whole source tree and is meant to catch up on events that were missed
+ * while the linker was offline. Everything else is handled by the event loop.
+ *
+ * @param appConfig AppConfig
+ * @param logger Console
+ * @param linkLogger Console: logs the successful links
+ */
+export default async function linkMissingFiles(
+  appConfig: AppConfig,
+  logger: Console,
+  linkLogger: Console = logger
+): Promise<void> {
+  logger.info('Searching in %s', appConfig.source);
+
+  if (!fs.existsSync(appConfig.source)) {
+    logger.error('Ignoring because %s does not exist.', appConfig.source);
+    return;
+  }
+
+  const pending: Set<Promise<boolean>> = new Set();
+
+  // The walk only yields files below the source, so the excludes are the only check left
+  for (const filePath of walkSync(appConfig.source, logger)) {
+    if (appConfig.excludes && appConfig.excludes.test(filePath)) {
+      logger.info('Ignoring %s because it matches exclude pattern.', filePath);
+      continue;
+    }
+
+    const linking: Promise<boolean> = linkSourcePath(filePath, appConfig, logger, linkLogger)
+      .finally(() => pending.delete(linking));
+    pending.add(linking);
+
+    if (pending.size >= PARALLEL_LINKS) {
+      await Promise.race(pending);
+    }
+  }
+
+  await Promise.all(pending);
+}
@@ -7,7 +7,8 @@ import System from './syncthing/System';
 import ServiceConfig from './syncthing/ServiceConfig';
 import AppConfig from './AppConfig';
 import Logger from './Logger';
-import processSourcePath from './processSourcePath';
+import linkMissingFiles from './linkMissingFiles';
+import processSourcePath, { forgetItem, itemKey } from './processSourcePath';
 
 /**
  * Checks the connection to the Syncthing API
@@ -18,10 +19,11 @@ import processSourcePath from './processSourcePath';
 async function checkServiceConfig(config: ServiceConfig, logger: Console): Promise<void> {
   const system = new System(config, logger);
 
+  // A failing connection already throws in errors(), so no further probe is needed.
   const syncErrors = await system.errors();
-  system.clear();
 
   if (syncErrors.length > 0) {
+    system.clear();
     syncErrors.forEach(e => logger.error(e.message));
     throw new Error('Accessing Syncthing API failed.');
   }
@@ -40,8 +42,12 @@ async function getSourcePathForEvent(
 
   let sourcePath: string = '';
   try {
-    const folder = await config.folder(data.folder),
-      file = await database.file(data.folder, data.item);
+    // Both lookups are independent, so they are sent at the same time over the shared agent
+    const [folder, file] = await Promise.all([
+      config.folder(data.folder),
+      database.file(data.folder, data.item),
+    ]);
+    // Folders have no blocks hash, so they are skipped here without a stat of the path
     if (file.local.blocksHash === null) {
       return null;
     }
@@ -60,29 +66,53 @@ function sleep(ms: number): Promise<void> {
 async function main(): Promise<void> {
   const logger: Console = Logger.getInstance('main'),
     eventLogger: Console = Logger.getInstance('event'),
+    // Successful links are the most frequent records, they get a channel of their own to filter them by
+    linkLogger: Console = Logger.getInstance('link'),
     appConfig = AppConfig.getInstance();
 
   await checkServiceConfig(appConfig, Logger.getInstance('system'));
+
+  // Catch up on files, that were synced while the linker was offline
+  if (process.argv.includes('--bootstrap')) {
+    await linkMissingFiles(appConfig, logger, linkLogger);
+  }
+
   const config = new Config(appConfig, Logger.getInstance('config')),
     database = new Database(appConfig, Logger.getInstance('database'));
 
+  // Outlives the event streams, so events delivered again after a reconnect are still skipped
+  const seenIds: Set<number> = new Set();
+
+  const pendingLinks: Set<Promise<void>> = new Set(),
+    isQualified = appConfig.createQualifier(logger);
+
   let lastSeenId: number = 0,
-    continueWorking: boolean = true;
+    continueWorking: boolean = true,
+    eventStream: Events | undefined,
+    retryDelay: number = 1;
 
   process.on('SIGINT', () => {
     continueWorking = false;
+    eventStream?.stop();
   });
 
   logger.info('Waiting for events');
   while (continueWorking) {
-    const eventStream = new Events(appConfig, eventLogger, lastSeenId, appConfig.filters);
+    // The stream polls continuously and only needs to be recreated after an error
+    eventStream = new Events(appConfig, eventLogger, lastSeenId, appConfig.filters, undefined, seenIds);
 
     try {
       for await (const event of eventStream) {
-        eventLogger.info(JSON.stringify(event));
+        retryDelay = 1;
+        eventLogger.debug('%j', event);
 
-        if (['delete'].includes(event.data.action)) {
+        const data: EventData = event.data;
+        if (['delete'].includes(data.action)) {
           lastSeenId = event.id;
+          // A new version of the deleted item gets linked again, even if the old one was linked recently
+          if (data.folder && data.item) {
+            forgetItem(itemKey(data.folder, data.item));
+          }
           continue;
         }
 
@@ -92,16 +122,27 @@ async function main(): Promise<void> {
         }
 
         lastSeenId = event.id;
-        processSourcePath(sourcePath, appConfig, logger);
+
+        // Linking runs on the libuv thread pool, while the next event is already fetched
+        const key = itemKey(data.folder || '', data.item || '');
+        const linking: Promise<void> = processSourcePath(sourcePath, key, isQualified, appConfig, logger, linkLogger)
+          .catch(error => logger.error(error))
+          .finally(() => pendingLinks.delete(linking));
+        pendingLinks.add(linking);
       }
     } catch (error: any) {
-      // Timeout exceptions aren't logged because the next request continues where the previous ended.
+      // Socket timeouts aren't logged because the next request continues where the previous ended.
+      // Empty polls are ended by Syncthing itself, so every other error is a real one.
       if (error.message !== 'Timeout while fetching new events') {
         logger.error(error);
       }
-      await sleep(appConfig.timeout * 1000);
+      // Back off exponentially up to the timeout, so a restarting Syncthing isn't hammered with requests
+      await sleep(retryDelay * 1000);
+      retryDelay = Math.max(1, Math.min(retryDelay * 2, appConfig.timeout));
     }
   }
+
+  await Promise.all(pendingLinks);
 }
 
 main().catch(console.error);
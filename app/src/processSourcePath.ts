@@ -1,54 +1,221 @@
 import * as fs from 'fs';
 import * as path from 'path';
 
-import AppConfig from './AppConfig';
+import AppConfig, { SourcePathQualifier } from './AppConfig';
 
-function sourcePathIsQualified(sourcePath: string, appConfig: AppConfig, logger: Console): boolean {
-  if (!fs.existsSync(sourcePath)) {
-    logger.info(`Ignoring event for ${sourcePath} because it does not exist.`);
-    return false;
-  }
-  if (fs.lstatSync(sourcePath).isDirectory()) {
-    logger.info(`Ignoring event for ${sourcePath} because it\'s a folder.`);
-    return false;
+// Number of linked items remembered and for how long in milliseconds
+const SETTLED_ITEMS_SIZE = 4096;
+const SETTLED_ITEMS_TTL = 60 * 1000;
+
+// Milliseconds, in which only the first error linking with the same error code is logged
+const ERROR_LOG_INTERVAL = 1000;
+
+// Destination directories currently being created. Links into the same missing directory, that run
+// at the same time, share the promise of a single mkdir.
+const creatingDirectories: Map<string, Promise<void>> = new Map();
+
+// Items, that were linked recently, with the time they expire at. Deleted items are removed by main,
+// so a new version of them gets linked again.
+const settledItems: Map<string, number> = new Map();
+
+// Error codes logged within the current interval, with the number of errors suppressed since
+const suppressedErrors: Map<string, number> = new Map();
+
+/**
+ * Returns the key of an item in the settled items, made of the folder id and the path in the folder.
+ * It's known from the event alone, so a delete event removes its item without any lookup.
+ *
+ * @param folder string: Syncthing folder id
+ * @param item string: path of the item in the folder
+ */
+export function itemKey(folder: string, item: string): string {
+  return `${folder}\0${item}`;
+}
+
+/**
+ * Remembers the item as settled. Syncthing reports the same item again and again, while it's
+ * modified, so these events are skipped for a while without any syscall.
+ *
+ * @param key string: key of the linked item
+ */
+function settle(key: string): void {
+  settledItems.delete(key);
+  settledItems.set(key, Date.now() + SETTLED_ITEMS_TTL);
+  if (settledItems.size > SETTLED_ITEMS_SIZE) {
+    settledItems.delete(settledItems.keys().next().value as string);
   }
-  if (!sourcePath.startsWith(appConfig.source)) {
-    logger.info(`Ignoring event for ${sourcePath} because it does not start with ${appConfig.source}.`);
+}
+
+/**
+ * Forgets the item, so the next event for it gets linked again, even if it was linked recently.
+ *
+ * @param key string: key of the deleted item
+ */
+export function forgetItem(key: string): void {
+  settledItems.delete(key);
+}
+
+function isSettled(key: string): boolean {
+  const expiresAt = settledItems.get(key);
+  if (expiresAt === undefined) {
     return false;
   }
-  if (appConfig.excludes && appConfig.excludes.test(sourcePath)) {
-    logger.info(`Ignoring ${sourcePath} because it matches exclude pattern.`);
+  if (expiresAt < Date.now()) {
+    settledItems.delete(key);
     return false;
   }
   return true;
 }
 
-function linkSourceToDestination(sourcePath: string, destinationPath: string, logger: Console): void {
+function errorCode(error: unknown): string | undefined {
+  return (error as NodeJS.ErrnoException).code;
+}
+
+/**
+ * Links the source to the destination. The parent directory of the destination is only created, if
+ * the link failed because it's missing, so the common case costs a single link call. As ENOENT
+ * doesn't tell, which side is missing, the source is checked first. A source that vanished after
+ * its event is raised as ENOENT without creating anything in the destination.
+ *
+ * A bulk of files linked into the same missing directory at the same time waits for a single mkdir.
+ * Nothing is remembered beyond that, so a parent removed by a consumer of the destination gets
+ * created again by the next link into it.
+ *
+ * @param sourcePath string: path of the file to link
+ * @param destinationPath string: path of the link to create
+ * @param logger Console
+ */
+async function linkCreatingParent(sourcePath: string, destinationPath: string, logger: Console): Promise<void> {
+  try {
+    await fs.promises.link(sourcePath, destinationPath);
+    return;
+  } catch (error) {
+    if (errorCode(error) !== 'ENOENT') {
+      throw error;
+    }
+  }
+
+  // Raises ENOENT, if the source is gone
+  await fs.promises.lstat(sourcePath);
+
   const destinationParent = path.dirname(destinationPath);
-  if (!fs.existsSync(destinationParent)) {
-    fs.mkdirSync(destinationParent, { recursive: true });
-    logger.info(`Created parent directory ${destinationParent} for ${destinationPath}.`)
+  let creating = creatingDirectories.get(destinationParent);
+  if (!creating) {
+    creating = fs.promises.mkdir(destinationParent, { recursive: true })
+      .then(created => {
+        if (created) {
+          logger.info('Created parent directory %s for %s.', destinationParent, destinationPath);
+        }
+      })
+      .finally(() => creatingDirectories.delete(destinationParent));
+    creatingDirectories.set(destinationParent, creating);
   }
 
-  if (fs.existsSync(destinationPath)) {
+  await creating;
+  await fs.promises.link(sourcePath, destinationPath);
+}
+
+/**
+ * Logs the error of a failed link, but only the first per error code within a second. A full disk or
+ * missing permissions make every link fail, so the flood of errors is reduced to a count instead.
+ *
+ * @param sourcePath string: path of the file to link
+ * @param destinationPath string: path of the link to create
+ * @param error unknown: error thrown while linking
+ * @param logger Console
+ */
+function logLinkError(sourcePath: string, destinationPath: string, error: unknown, logger: Console): void {
+  const code = errorCode(error) || 'UNKNOWN',
+    suppressed = suppressedErrors.get(code);
+  if (suppressed !== undefined) {
+    suppressedErrors.set(code, suppressed + 1);
     return;
   }
 
+  logger.error('Error linking %s to %s:', sourcePath, destinationPath, error);
+  suppressedErrors.set(code, 0);
+  setTimeout(() => {
+    const count = suppressedErrors.get(code) || 0;
+    suppressedErrors.delete(code);
+    if (count > 0) {
+      logger.error('Suppressed %d more errors linking with %s.', count, code);
+    }
+  }, ERROR_LOG_INTERVAL).unref();
+}
+
+async function linkSourceToDestination(
+  sourcePath: string,
+  destinationPath: string,
+  logger: Console,
+  linkLogger: Console
+): Promise<boolean> {
   try {
-    fs.linkSync(sourcePath, destinationPath);
-    logger.info(`Linked ${sourcePath} to ${destinationPath}`);
+    await linkCreatingParent(sourcePath, destinationPath, logger);
+    linkLogger.info('Linked %s to %s', sourcePath, destinationPath);
+    return true;
   } catch (error) {
-    logger.error(`Error linking ${sourcePath} to ${destinationPath}:`, error);
+    const code = errorCode(error);
+    // The source was removed again, after Syncthing reported it
+    if (code === 'ENOENT') {
+      logger.debug('Ignoring %s because it does not exist anymore.', sourcePath);
+      return false;
+    }
+    // An existing destination got linked before
+    if (code !== 'EEXIST') {
+      logLinkError(sourcePath, destinationPath, error, logger);
+    }
+    return false;
   }
 }
 
-export default function processSourcePath(sourcePath: string, appConfig: AppConfig, logger: Console): void {
-  if (!sourcePathIsQualified(sourcePath, appConfig, logger)) {
+/**
+ * Links the source path into the destination without checking if it's qualified. Callers need to
+ * make sure, that the path is an existing file starting with the source prefix and not excluded.
+ * Resolves to true, if the link was created.
+ *
+ * @param sourcePath string: path of the file to link
+ * @param appConfig AppConfig
+ * @param logger Console
+ * @param linkLogger Console: logs the successful links, which are the most frequent records
+ */
+export function linkSourcePath(
+  sourcePath: string,
+  appConfig: AppConfig,
+  logger: Console,
+  linkLogger: Console = logger
+): Promise<boolean> {
+  const destinationPath = appConfig.destinationPrefix + sourcePath.slice(appConfig.sourcePrefix.length);
+
+  return linkSourceToDestination(sourcePath, destinationPath, logger, linkLogger);
+}
+
+/**
+ * Links the source path of an event, if it's qualified and its item wasn't linked recently.
+ *
+ * @param sourcePath string: path of the file to link
+ * @param key string: key of the item, see itemKey()
+ * @param isQualified SourcePathQualifier
+ * @param appConfig AppConfig
+ * @param logger Console
+ * @param linkLogger Console: logs the successful links, which are the most frequent records
+ */
+export default async function processSourcePath(
+  sourcePath: string,
+  key: string,
+  isQualified: SourcePathQualifier,
+  appConfig: AppConfig,
+  logger: Console,
+  linkLogger: Console = logger
+): Promise<void> {
+  if (isSettled(key)) {
+    logger.debug('Ignoring event for %s because it was handled recently.', sourcePath);
+    return;
+  }
+  if (!isQualified(sourcePath)) {
     return;
   }
 
-  const relative = path.relative(appConfig.source, sourcePath),
-    destinationPath = path.join(appConfig.destination, relative);
-
-  linkSourceToDestination(sourcePath, destinationPath, logger);
+  if (await linkSourcePath(sourcePath, appConfig, logger, linkLogger)) {
+    settle(key);
+  }
 }
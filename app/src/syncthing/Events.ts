@@ -2,6 +2,12 @@ import RequestBase, { RequestParameters } from './RequestBase';
 import ServiceConfig from './ServiceConfig';
 import SyncthingException from './SyncthingException';
 
+// Number of event ids remembered to skip events, that get delivered more than once
+const SEEN_IDS_SIZE = 4096;
+
+// Seconds Syncthing answers an empty long-poll before the request itself times out
+const LONG_POLL_MARGIN = 5;
+
 export interface EventData {
   action: string;
   error: string | null;
@@ -35,18 +41,37 @@ export default class Events extends RequestBase {
 
   private readonly filters?: string[];
   private readonly limit: number;
+  private readonly seenIds: Set<number>;
   private _lastSeenId: number;
   private _count: number = 0;
+  private stopped: boolean = false;
 
-  constructor(config: ServiceConfig, logger: Console, lastSeenId: number, filters?: string[], limit: number = 50) {
+  /**
+   * @param config ServiceConfig
+   * @param logger Console
+   * @param lastSeenId number: id to continue after
+   * @param filters string[]: event types to subscribe to
+   * @param limit number: number of events to query in the history
+   * @param seenIds Set<number>: ids of events yielded before. Passing the same set to a stream,
+   *                that replaces a failed one, skips events delivered again after reconnecting.
+   */
+  constructor(
+    config: ServiceConfig,
+    logger: Console,
+    lastSeenId: number,
+    filters?: string[],
+    limit: number = 50,
+    seenIds: Set<number> = new Set()
+  ) {
     super(config, logger);
     this._lastSeenId = lastSeenId;
     this.filters = filters;
     this.limit = limit;
+    this.seenIds = seenIds;
   }
 
   /**
-   * The number of events that have been processed by this event stream.
+   * The number of events that have been received by this event stream.
    */
   get count(): number {
     return this._count;
@@ -59,6 +84,13 @@ export default class Events extends RequestBase {
     return this._lastSeenId;
   }
 
+  /**
+   * Stops the event stream once the currently running poll returns.
+   */
+  stop(): void {
+    this.stopped = true;
+  }
+
   /**
    * To receive events, perform an HTTP GET of /rest/events.
    *
@@ -85,6 +117,12 @@ export default class Events extends RequestBase {
    *                 to catch up with the latest event ID after a disconnection, for example,
    *                 /rest/events?since=0&limit=1.
    *
+   *                 The generator keeps polling with the last seen ID on the same connection until
+   *                 stop() is called, so one stream serves any number of polls. The next poll is
+   *                 sent before the events of the current one are yielded, so waiting for new
+   *                 events overlaps with processing. Events with an ID that was yielded before are
+   *                 skipped.
+   *
    *                 Args:
    *                     using_url (str): REST HTTP endpoint
    *                     filters (List[str]): Creates an "event group" in Syncthing to
@@ -100,33 +138,45 @@ export default class Events extends RequestBase {
     filters: string[] | null = null,
     limit: number | null = null
   ): AsyncGenerator<Event> {
-    const params: RequestParameters = {
-      since: this.lastSeenId,
-    };
+    // Everything but since stays the same for all polls of the stream
+    const params: RequestParameters = {};
 
-    if (limit !== null) {
+    // A limit that is no positive integer would be rejected by Syncthing, so it's left out
+    if (limit !== null && Number.isInteger(limit) && limit > 0) {
       params.limit = limit;
     }
 
     if (this.serviceConfig.timeout > 0) {
-      params.timeout = this.serviceConfig.timeout;
+      params.timeout = Math.max(1, this.serviceConfig.timeout - LONG_POLL_MARGIN);
     }
 
     if (filters && filters.length > 0) {
       params.events = filters.join(',');
     }
 
-    try {
-      const data = await this.get<Event[]>(usingUrl, undefined, undefined, params);
-      if (data && data.length > 0) {
-        for (const event of data) {
-          this._count++;
-          yield event;
-        }
+    let poll: Promise<Event[]> | undefined = this.poll(usingUrl, { ...params, since: this.lastSeenId });
+    while (poll && !this.stopped) {
+      const data = await poll;
+      if (data.length > 0) {
         this._lastSeenId = data[data.length - 1].id;
       }
-    } catch (error) {
-      throw new SyncthingException('Timeout while fetching new events', { cause: error });
+
+      // The next poll already waits for new events, while the events of this one get processed
+      poll = this.stopped ? undefined : this.poll(usingUrl, { ...params, since: this.lastSeenId });
+
+      this._count += data.length;
+      for (const event of data) {
+        if (this.seenIds.has(event.id)) {
+          continue;
+        }
+
+        // Sets keep the insertion order, so the first id is the oldest one
+        this.seenIds.add(event.id);
+        if (this.seenIds.size > SEEN_IDS_SIZE) {
+          this.seenIds.delete(this.seenIds.values().next().value as number);
+        }
+        yield event;
+      }
     }
   }
 
@@ -145,4 +195,25 @@ export default class Events extends RequestBase {
   async* [Symbol.asyncIterator](): AsyncGenerator<Event> {
     yield* this.events('events', this.filters || null, this.limit);
   }
+
+  /**
+   * Requests the next events. A failing request is only raised once the result is awaited, so a
+   * poll that is abandoned when the stream stops doesn't cause an unhandled rejection. Only a socket
+   * timeout is reported as timeout, every other error is raised as it is, to be logged by the caller.
+   *
+   * @param usingUrl string: REST HTTP endpoint
+   * @param params RequestParameters
+   */
+  private poll(usingUrl: string, params: RequestParameters): Promise<Event[]> {
+    const request = this.get<Event[]>(usingUrl, undefined, undefined, params)
+      .then(data => data || [])
+      .catch(error => {
+        if (error instanceof SyncthingException && error.message === 'Request timeout') {
+          throw new SyncthingException('Timeout while fetching new events', { cause: error });
+        }
+        throw error;
+      });
+    request.catch(() => undefined);
+    return request;
+  }
 }
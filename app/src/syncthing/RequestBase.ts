@@ -1,19 +1,10 @@
-import * as fs from 'fs';
-import * as https from 'https';
+import type { IncomingHttpHeaders, OutgoingHttpHeaders } from 'http';
 
 import SyncthingException from './SyncthingException';
-import ServiceConfig from './ServiceConfig';
+import ServiceConfig, { Transport } from './ServiceConfig';
 
 type HttpMethod = 'GET' | 'POST' | 'PUT' | 'DELETE';
 
-interface RequestConfig {
-  method: string;
-  headers: Headers;
-  signal: AbortSignal;
-  agent?: https.Agent;
-  body?: string;
-}
-
 export interface RequestData {
   device?: string;
   folder?: string | string[];
@@ -50,7 +41,7 @@ export interface Response<T> {
   data: T;
   status: number;
   statusText: string,
-  headers: Headers;
+  headers: IncomingHttpHeaders;
 }
 
 
@@ -59,22 +50,24 @@ export default class RequestBase {
   protected prefix: string = '';
 
   protected serviceConfig: ServiceConfig;
-  protected verify: boolean;
   protected headers: RequestHeaders;
   protected protocol: string;
   protected url: string;
   protected logger: Console;
 
-  constructor(config: ServiceConfig, logger: Console) {
-    if (config.sslCertFile && !fs.existsSync(config.sslCertFile)) {
-      throw new SyncthingException(`ssl_cert_file does not exist at location, ${config.sslCertFile}`);
-    }
+  // Headers sent with every request, built once instead of merged per call
+  private readonly defaultHeaders: OutgoingHttpHeaders;
+  private transport?: Transport;
 
+  constructor(config: ServiceConfig, logger: Console) {
     this.serviceConfig = config;
-    this.verify = !!(config.sslCertFile || config.isHttps);
     this.headers = {
       'X-API-Key': config.apiKey
     };
+    this.defaultHeaders = {
+      ...this.headers,
+      'Content-Type': 'application/json'
+    };
     this.protocol = config.isHttps ? 'https' : 'http';
     this.url = `${this.protocol}://${config.host}:${config.port}`;
     this.logger = logger;
@@ -153,53 +146,51 @@ export default class RequestBase {
       );
     }
 
-    const controller = new AbortController(),
-      timeoutId = setTimeout(() => controller.abort(), this.serviceConfig.timeout * 1000),
-      mergedHeaders = new Headers({
-        ...this.headers,
-        ...headers,
-        'Content-Type': 'application/json'
-      }),
-      fetchConfig: RequestConfig = {
-        method: method.toString().toUpperCase(),
-        headers: mergedHeaders,
-        signal: controller.signal,
-      };
-
-    // Body nur bei entsprechenden Methoden hinzufügen
-    if (method !== 'GET' && data && Object.keys(data).length > 0) {
-      fetchConfig.body = JSON.stringify(data);
+    if (!this.transport) {
+      this.transport = await this.serviceConfig.getTransport();
     }
 
-    if (this.verify && this.serviceConfig.sslCertFile) {
-      fetchConfig.agent = new https.Agent({
-        ca: fs.readFileSync(this.serviceConfig.sslCertFile, 'utf8')
+    const body = method !== 'GET' && data && Object.keys(data).length > 0 ? JSON.stringify(data) : undefined,
+      transport = this.transport;
+
+    return new Promise<Response<T>>((resolve, reject) => {
+      const request = transport.request(url, {
+        method: method,
+        agent: transport.agent,
+        headers: headers ? { ...this.defaultHeaders, ...headers } : this.defaultHeaders,
+        timeout: this.serviceConfig.timeout * 1000,
+      }, response => {
+        // Chunks are kept as buffers and decoded once, instead of decoding and concatenating each chunk
+        const chunks: Buffer[] = [];
+        response.on('data', (chunk: Buffer) => {
+          chunks.push(chunk);
+        });
+        response.on('error', reject);
+        response.on('end', () => {
+          const status = response.statusCode || 0;
+          if (status < 200 || status >= 300) {
+            reject(new SyncthingException(`HTTP request error: ${status}`));
+            return;
+          }
+
+          try {
+            const isJson = response.headers['content-type']?.includes('application/json'),
+              responseBody = Buffer.concat(chunks).toString('utf8');
+            resolve({
+              data: (isJson ? JSON.parse(responseBody) : responseBody) as T,
+              status: status,
+              statusText: response.statusMessage || '',
+              headers: response.headers
+            });
+          } catch (error) {
+            reject(error);
+          }
+        });
       });
-    }
 
-    try {
-      const response = await fetch(url.toString(), fetchConfig);
-      clearTimeout(timeoutId);
-
-      const isJson = response.headers.get('content-type')?.includes('application/json');
-      const responseData = isJson ? await response.json() : await response.text();
-
-      if (!response.ok) {
-        throw new SyncthingException(`HTTP request error: ${response.status}`);
-      }
-
-      return {
-        data: responseData as T,
-        status: response.status,
-        statusText: response.statusText,
-        headers: response.headers
-      };
-      /* eslint-disable @typescript-eslint/no-explicit-any */
-    } catch (error: any) {
-      if (error.name === 'AbortError') {
-        throw new SyncthingException('Request timeout', { cause: error });
-      }
-      throw error;
-    }
+      request.on('timeout', () => request.destroy(new SyncthingException('Request timeout')));
+      request.on('error', reject);
+      request.end(body);
+    });
   }
 }
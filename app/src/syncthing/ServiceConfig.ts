@@ -1,7 +1,28 @@
+import * as fs from 'fs';
+import type { Agent, AgentOptions, ClientRequest, IncomingMessage, RequestOptions } from 'http';
+
+import SyncthingException from './SyncthingException';
+
 // in seconds
 export const DEFAULT_TIMEOUT = 100;
 
+// Pooled connections send TCP keep-alive probes, so an idle connection between two event polls
+// isn't dropped silently by the network, and requests are sent without Nagle delay.
+const AGENT_OPTIONS: AgentOptions = {
+  keepAlive: true,
+  keepAliveMsecs: 30000,
+  maxSockets: 8,
+  noDelay: true,
+};
+
+export interface Transport {
+  agent: Agent;
+  request: (url: URL, options: RequestOptions, callback: (response: IncomingMessage) => void) => ClientRequest;
+}
+
 export default class ServiceConfig {
+  private transport?: Promise<Transport>;
+
   constructor(
     public apiKey: string,
     public host: string = 'localhost',
@@ -11,4 +32,41 @@ export default class ServiceConfig {
     public sslCertFile: string | undefined = undefined,
   ) {
   }
+
+  /**
+   * Returns the transport shared by all endpoints created with this config. All requests go
+   * through the same keep-alive agent, so connections to Syncthing are reused instead of being
+   * opened for every call.
+   */
+  getTransport(): Promise<Transport> {
+    if (!this.transport) {
+      this.transport = this.createTransport();
+    }
+    return this.transport;
+  }
+
+  private async createTransport(): Promise<Transport> {
+    // Checked once here instead of in every endpoint constructor
+    if (this.sslCertFile && !fs.existsSync(this.sslCertFile)) {
+      throw new SyncthingException(`ssl_cert_file does not exist at location, ${this.sslCertFile}`);
+    }
+
+    if (!this.isHttps) {
+      const http = await import('http');
+      return {
+        agent: new http.Agent(AGENT_OPTIONS),
+        request: http.request,
+      };
+    }
+
+    // https is only needed for secured connections, so it's not loaded on startup
+    const https = await import('https');
+    return {
+      agent: new https.Agent({
+        ...AGENT_OPTIONS,
+        ca: this.sslCertFile ? fs.readFileSync(this.sslCertFile, 'utf8') : undefined,
+      }),
+      request: https.request,
+    };
+  }
 }
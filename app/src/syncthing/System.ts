@@ -74,14 +74,11 @@ function keysToDatetime<T extends Record<string, Date | null | string | number>>
 
   if (typeof object === 'object') {
     for (const key of keys) {
-      if (!(key in object)) {
-        continue;
-      }
+      // Missing keys are undefined and fail the type check, no separate lookup needed
       const value = object[key];
-      if (typeof value !== 'string') {
-        continue;
+      if (typeof value === 'string') {
+        object[key] = parseDatetime(value) as T[keyof T];
       }
-      object[key] = parseDatetime(value) as T[keyof T];
     }
   }
 
@@ -256,15 +253,8 @@ export default class System extends RequestBase {
    *                 list: of :obj:`.ErrorEvent` instances.
    */
   async errors(): Promise<ErrorEvent[]> {
-    const response = await this.get<{ errors: { when: string, message: string }[] }>('error');
-    const errors = response.errors || [];
-    const result: ErrorEvent[] = [];
-    errors.map((error: { when: string, message: string }) => {
-      const when = parseDatetime(error.when);
-      const message = error.message || '';
-      result.push(new ErrorEvent(when, message));
-    });
-    return result;
+    const response = await this.get<{ errors: { when: string, message: string }[] | null }>('error');
+    return (response.errors || []).map(error => new ErrorEvent(parseDatetime(error.when), error.message || ''));
   }
 
   /**